@@ -7,6 +7,10 @@ This server provides endpoints for:
 - Camera capture and classification (for Raspberry Pi)
 - Health check and class listing
 
+Inference requests are admitted through a priority scheduler so interactive
+identifications are not starved by bulk uploads (see utils/scheduler.py).
+Opt-in per-request profiling is available under /debug (see utils/profiling.py).
+
 The model is trained on 10 Philippine snake species.
 
 Run: python app.py
@@ -16,11 +20,16 @@ import os
 import io
 import base64
 import logging
-from flask import Flask, request, jsonify
+import hmac
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import numpy as np
 from PIL import Image
 
+from config import SCHEDULER_CONFIG, PROFILING_CONFIG, PROFILING_ADMIN_TOKEN
+from utils.scheduler import InferenceScheduler, QueueFullError, DeadlineExceededError
+from utils.profiling import RequestProfiler
+
 # Try to import optional dependencies
 try:
     import onnxruntime as ort
@@ -48,7 +57,8 @@ CORS(app, resources={
     r"/*": {
         "origins": "*",
         "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization", "Accept"],
+        "allow_headers": ["Content-Type", "Authorization", "Accept", "X-Priority", "X-Deadline-Ms",
+                          "X-Profile", "X-Admin-Token"],
         "supports_credentials": False
     }
 })
@@ -60,14 +70,14 @@ def handle_preflight():
         response = app.make_default_options_response()
         response.headers['Access-Control-Allow-Origin'] = '*'
         response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Accept'
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Accept, X-Priority, X-Deadline-Ms, X-Profile, X-Admin-Token'
         return response
 
 @app.after_request
 def after_request(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Accept'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Accept, X-Priority, X-Deadline-Ms, X-Profile, X-Admin-Token'
     return response
 
 # Configuration
@@ -162,6 +172,18 @@ if ONNX_AVAILABLE and os.path.exists(MODEL_PATH):
     except Exception as e:
         logger.error(f"Failed to load ONNX model: {e}")
 
+# Admission control for the shared ONNX session
+scheduler = InferenceScheduler(**SCHEDULER_CONFIG)
+if scheduler.class_limits["bulk"] >= scheduler.max_concurrent:
+    logger.warning(
+        "Bulk inference can occupy every worker (INFERENCE_WORKERS="
+        f"{scheduler.max_concurrent}); interactive requests may wait behind it. "
+        "Set INFERENCE_WORKERS to 2 or more."
+    )
+
+# On-demand request profiling (disabled unless PROFILING_ENABLED=true)
+profiler = RequestProfiler(**PROFILING_CONFIG)
+
 
 def preprocess_image(image: Image.Image) -> np.ndarray:
     """
@@ -179,6 +201,11 @@ def preprocess_image(image: Image.Image) -> np.ndarray:
     if image.mode != 'RGB':
         image = image.convert('RGB')
     
+    # Sample memory while the full-size decoded image is alive; its pixel
+    # buffer is allocated by Pillow outside tracemalloc, so it only shows
+    # up in the capture's RSS figures
+    profiler.checkpoint()
+    
     # Resize to model input size (320x320)
     image = image.resize(INPUT_SIZE, Image.Resampling.LANCZOS)
     
@@ -218,6 +245,7 @@ def predict_with_model(image: Image.Image) -> list:
         
         # Run inference
         outputs = onnx_session.run(None, {input_name: input_tensor})
+        profiler.checkpoint()
         
         # Get probabilities (apply softmax if needed)
         logits = outputs[0][0]
@@ -247,6 +275,72 @@ def predict_with_model(image: Image.Image) -> list:
         return get_mock_predictions()
 
 
+def run_scheduled(image: Image.Image, default_priority: str) -> list:
+    """
+    Run prediction once the scheduler admits the request.
+    
+    The priority class comes from the X-Priority header (or the `priority`
+    query parameter) and the deadline from X-Deadline-Ms (milliseconds),
+    falling back to the class defaults. Admins may request a profile of
+    the request with X-Profile (see utils/profiling.py).
+    
+    Raises:
+        QueueFullError: Too many requests of this class are already waiting
+        DeadlineExceededError: The request expired before it was admitted
+    """
+    requested = request.headers.get('X-Priority') or request.args.get('priority')
+    priority = scheduler.resolve_priority(requested, default_priority)
+    deadline = scheduler.resolve_deadline(priority, request.headers.get('X-Deadline-Ms'))
+    
+    # Only admins may ask for a profile; other traffic is profiled solely
+    # through sampling. Admin captures run alone so tracemalloc figures are
+    # not mixed with other inferences; sampled captures share the pool so
+    # they never stall other traffic, and their memory figures are
+    # approximate whenever other inferences overlap them.
+    requested_profile = (
+        request.headers.get('X-Profile', '').lower() in ('1', 'true')
+        and is_admin_request()
+    )
+    profile = profiler.should_capture(requested=requested_profile)
+    exclusive = profile and requested_profile
+    
+    with scheduler.slot(priority, deadline, exclusive=exclusive):
+        if not profile:
+            return predict_with_model(image)
+        
+        # Profile only the work itself, not the time spent queued
+        with profiler.capture(metadata={
+            "endpoint": request.path,
+            "priority": priority,
+            "image_format": image.format,
+            "image_size": list(image.size),
+            "image_mode": image.mode,
+            # Size of the decoded source image (before RGB conversion)
+            "decoded_image_bytes": image.width * image.height * len(image.getbands()),
+            "exclusive": exclusive,
+            "concurrent_inferences": scheduler.running_count()
+        }):
+            return predict_with_model(image)
+
+
+def scheduler_error_response(error: Exception):
+    """Build the JSON error response for a request the scheduler refused."""
+    status = 503 if isinstance(error, QueueFullError) else 504
+    logger.warning(f"Inference request not admitted: {error}")
+    return jsonify({
+        "success": False,
+        "message": str(error)
+    }), status
+
+
+def is_admin_request() -> bool:
+    """Check the X-Admin-Token header against the configured admin token."""
+    if not PROFILING_ADMIN_TOKEN:
+        return False
+    token = request.headers.get('X-Admin-Token', '')
+    return hmac.compare_digest(token.encode(), PROFILING_ADMIN_TOKEN.encode())
+
+
 def softmax(x):
     """Apply softmax function to convert logits to probabilities."""
     exp_x = np.exp(x - np.max(x))
@@ -288,7 +382,8 @@ def health_check():
         "model_loaded": onnx_session is not None,
         "camera_available": CV2_AVAILABLE,
         "num_classes": len(LABELS),
-        "input_size": INPUT_SIZE
+        "input_size": INPUT_SIZE,
+        "scheduler": scheduler.get_stats()
     })
 
 
@@ -352,14 +447,17 @@ def predict():
                 "message": "No image provided. Send as 'image' file or base64 in JSON."
             }), 400
         
-        # Run prediction
-        predictions = predict_with_model(image)
+        # Run prediction; unlabelled (automated) uploads are treated as bulk
+        # so they cannot crowd out the web UI, which sends X-Priority
+        predictions = run_scheduled(image, "bulk")
         
         return jsonify({
             "success": True,
             "predictions": predictions
         })
         
+    except (QueueFullError, DeadlineExceededError) as e:
+        return scheduler_error_response(e)
     except Exception as e:
         logger.error(f"Prediction endpoint error: {e}")
         return jsonify({
@@ -409,7 +507,7 @@ def predict_camera():
         image = Image.fromarray(frame_rgb)
         
         # Run prediction
-        predictions = predict_with_model(image)
+        predictions = run_scheduled(image, "camera")
         
         # Also return the captured image as base64
         buffer = io.BytesIO()
@@ -422,6 +520,8 @@ def predict_camera():
             "captured_image": f"data:image/jpeg;base64,{image_base64}"
         })
         
+    except (QueueFullError, DeadlineExceededError) as e:
+        return scheduler_error_response(e)
     except Exception as e:
         logger.error(f"Camera prediction error: {e}")
         return jsonify({
@@ -430,6 +530,92 @@ def predict_camera():
         }), 500
 
 
+@app.route('/debug/profiling', methods=['GET', 'POST'])
+def profiling_settings():
+    """
+    View or change profiling settings at runtime (admin only).
+    
+    POST accepts JSON with optional 'enabled' (bool) and 'sample_rate' (0.0-1.0).
+    """
+    if not is_admin_request():
+        return jsonify({"success": False, "message": "Forbidden"}), 403
+    
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            return jsonify({
+                "success": False,
+                "message": "Request body must be a JSON object"
+            }), 400
+        
+        # Validate everything before applying anything
+        enabled = data.get('enabled', profiler.enabled)
+        if not isinstance(enabled, bool):
+            return jsonify({
+                "success": False,
+                "message": "enabled must be true or false"
+            }), 400
+        
+        sample_rate = data.get('sample_rate', profiler.sample_rate)
+        if isinstance(sample_rate, bool) or not isinstance(sample_rate, (int, float)):
+            return jsonify({
+                "success": False,
+                "message": "sample_rate must be a number between 0 and 1"
+            }), 400
+        
+        profiler.enabled = enabled
+        profiler.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+    
+    return jsonify({
+        "success": True,
+        "enabled": profiler.enabled,
+        "sample_rate": profiler.sample_rate
+    })
+
+
+@app.route('/debug/profiles', methods=['GET'])
+def list_profiles():
+    """List stored profile captures, most recent first (admin only)."""
+    if not is_admin_request():
+        return jsonify({"success": False, "message": "Forbidden"}), 403
+    
+    captures = profiler.list_captures()
+    return jsonify({
+        "success": True,
+        "count": len(captures),
+        "data": captures
+    })
+
+
+@app.route('/debug/profiles/<int:capture_id>', methods=['GET'])
+def download_profile(capture_id):
+    """
+    Download a profile capture (admin only).
+    
+    Returns the cProfile data in pstats format (load with pstats or
+    snakeviz), or a plain-text report with ?format=text.
+    """
+    if not is_admin_request():
+        return jsonify({"success": False, "message": "Forbidden"}), 403
+    
+    if request.args.get('format') == 'text':
+        report = profiler.get_text_report(capture_id)
+        if report is None:
+            return jsonify({"success": False, "message": "Profile not found"}), 404
+        return Response(report, mimetype='text/plain')
+    
+    data = profiler.get_pstats(capture_id)
+    if data is None:
+        return jsonify({"success": False, "message": "Profile not found"}), 404
+    return Response(
+        data,
+        mimetype='application/octet-stream',
+        headers={'Content-Disposition': f'attachment; filename=profile_{capture_id}.prof'}
+    )
+
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
@@ -31,6 +31,40 @@ CAMERA_CONFIG = {
     "fps": 30,
 }
 
+# Inference scheduler configuration
+# Priority class is chosen per request with the X-Priority header
+# (interactive, camera, bulk); X-Deadline-Ms may shorten the deadline.
+INFERENCE_WORKERS = max(1, int(os.environ.get("INFERENCE_WORKERS", 2)))
+
+SCHEDULER_CONFIG = {
+    "max_concurrent": INFERENCE_WORKERS,
+    # Per-class concurrency caps derived from the worker count: interactive
+    # may use every worker, camera and bulk are each capped at one fewer so
+    # bulk alone can never fill the pool. With a single worker no worker can
+    # be kept free (app.py logs a warning).
+    "class_limits": {
+        "interactive": INFERENCE_WORKERS,
+        "camera": max(1, INFERENCE_WORKERS - 1),
+        "bulk": max(1, INFERENCE_WORKERS - 1),
+    },
+    # Maximum waiting requests per class before rejecting with 503
+    "queue_limits": {"interactive": 16, "camera": 4, "bulk": 64},
+    # Default deadlines in seconds
+    "default_deadlines": {"interactive": 10.0, "camera": 10.0, "bulk": 120.0},
+}
+
+# On-demand profiling configuration (debugging only, off by default)
+# When enabled, requests sent with "X-Profile: 1" and a valid admin token, or
+# picked by sampling, are profiled. Captures are served from /debug/profiles
+# to callers presenting the admin token in the X-Admin-Token header.
+PROFILING_CONFIG = {
+    "enabled": os.environ.get("PROFILING_ENABLED", "False").lower() == "true",
+    "sample_rate": float(os.environ.get("PROFILING_SAMPLE_RATE", 0.0)),
+    "max_captures": int(os.environ.get("PROFILING_MAX_CAPTURES", 20)),
+    "top_allocations": 10,
+}
+PROFILING_ADMIN_TOKEN = os.environ.get("PROFILING_ADMIN_TOKEN", "")
+
 # CORS configuration
 CORS_CONFIG = {
     "origins": [
@@ -40,5 +74,6 @@ CORS_CONFIG = {
         "https://*.lovable.dev",
     ],
     "methods": ["GET", "POST", "OPTIONS"],
-    "allow_headers": ["Content-Type", "Authorization"],
+    "allow_headers": ["Content-Type", "Authorization", "X-Priority", "X-Deadline-Ms",
+                      "X-Profile", "X-Admin-Token"],
 }
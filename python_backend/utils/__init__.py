@@ -4,6 +4,8 @@ Snake Vision Hub - Python Backend Utilities
 
 from .preprocess import preprocess_for_mobilenet, decode_predictions
 from .labels import COMMON_NAMES, SCIENTIFIC_NAMES, VENOM_LEVELS, get_species_info, get_all_species
+from .scheduler import InferenceScheduler, SchedulerError, QueueFullError, DeadlineExceededError
+from .profiling import RequestProfiler
 
 __all__ = [
     'preprocess_for_mobilenet',
@@ -12,5 +14,10 @@ __all__ = [
     'SCIENTIFIC_NAMES',
     'VENOM_LEVELS',
     'get_species_info',
-    'get_all_species'
+    'get_all_species',
+    'InferenceScheduler',
+    'SchedulerError',
+    'QueueFullError',
+    'DeadlineExceededError',
+    'RequestProfiler'
 ]
@@ -0,0 +1,270 @@
+"""
+On-demand per-request profiling for debugging slow or memory-heavy inputs.
+
+Captures are opt-in and off by default. When enabled, a request is profiled
+if it asks for it (X-Profile header) or is picked by random sampling:
+- cProfile statistics, downloadable in the standard pstats format
+- tracemalloc peak memory, top allocation sites at the fullest checkpoint()
+  and allocations retained after the request
+- Process RSS growth, which also covers native buffers (Pillow images,
+  ONNX Runtime arenas) that tracemalloc cannot see
+The last N captures are kept in an in-memory ring buffer.
+
+tracemalloc traces the whole process, so a capture's memory figures include
+any other request running alongside it. Callers can run a capture with no
+other inference (see the scheduler's exclusive slots) or record how many
+inferences overlapped it in the metadata.
+"""
+
+import contextlib
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+# Try to import optional dependencies
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False  # Windows
+
+
+# Frames from the profiling machinery itself, hidden from allocation reports
+_SELF_FILTERS = [
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, contextlib.__file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+]
+
+
+def _current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes (Linux only), or None."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _max_rss() -> Optional[int]:
+    """Lifetime peak RSS of this process in bytes, or None if unavailable."""
+    if not RESOURCE_AVAILABLE:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and kilobytes elsewhere
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+class RequestProfiler:
+    """
+    Opt-in cProfile/tracemalloc capture with a ring buffer of results.
+
+    Args:
+        enabled: Master switch; when off, should_capture() is always False
+        sample_rate: Fraction of requests (0.0-1.0) profiled without asking
+        max_captures: Number of captures kept in the ring buffer
+        top_allocations: Number of allocation sites recorded per capture
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        sample_rate: float = 0.0,
+        max_captures: int = 20,
+        top_allocations: int = 10
+    ):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.top_allocations = top_allocations
+        self._captures = deque(maxlen=max_captures)
+        self._counter = itertools.count(1)
+        # Guards against overlapping captures, which cProfile cannot run;
+        # this does not isolate tracemalloc from unprofiled requests
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def should_capture(self, requested: bool = False) -> bool:
+        """Decide whether the current request should be profiled."""
+        if not self.enabled:
+            return False
+        return requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    @contextmanager
+    def capture(self, metadata: Optional[dict] = None):
+        """
+        Profile the enclosed block.
+
+        Callers decide with should_capture() first so they can isolate the
+        request (e.g. an exclusive scheduler slot) before entering.
+
+        Args:
+            metadata: Extra details stored with the capture (endpoint,
+                image format, size, mode, concurrent inferences, ...)
+        """
+        if not self._busy.acquire(blocking=False):
+            yield
+            return
+
+        try:
+            tracing_already = tracemalloc.is_tracing()
+            if not tracing_already:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            start_current, _ = tracemalloc.get_traced_memory()
+            baseline = tracemalloc.take_snapshot()
+            start_rss = _current_rss()
+            start_max_rss = _max_rss()
+
+            profiler = cProfile.Profile()
+            self._local.state = {
+                "traced": 0,
+                "snapshot": None,
+                "rss_peak": start_rss,
+                "profiler": profiler,
+                "overhead": 0.0
+            }
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                state = self._local.state
+                del self._local.state
+                # Exclude time spent taking checkpoint snapshots
+                duration = time.perf_counter() - started - state["overhead"]
+                _, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot()
+                rss = _current_rss()
+                if rss is not None and state["rss_peak"] is not None:
+                    state["rss_peak"] = max(state["rss_peak"], rss)
+                if not tracing_already:
+                    tracemalloc.stop()
+
+                memory = {"memory_peak_bytes": peak - start_current}
+                if start_rss is not None:
+                    memory["rss_start_bytes"] = start_rss
+                    memory["rss_peak_growth_bytes"] = state["rss_peak"] - start_rss
+                if start_max_rss is not None:
+                    memory["max_rss_growth_bytes"] = _max_rss() - start_max_rss
+                self._store(
+                    profiler, duration, memory,
+                    baseline, state["snapshot"] or snapshot, snapshot, metadata
+                )
+        finally:
+            self._busy.release()
+
+    def checkpoint(self) -> None:
+        """
+        Snapshot allocations while the request's buffers are still alive.
+
+        Call at points where large intermediates exist (after decoding,
+        preprocessing, inference). Outside a capture this is a no-op; during
+        one, the snapshot with the most traced memory is kept and used for
+        the capture's top_allocations, and process RSS is sampled so native
+        buffers invisible to tracemalloc are reflected in the peak.
+        """
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            return
+
+        # Keep the snapshot cost out of the profile and the duration
+        state["profiler"].disable()
+        paused = time.perf_counter()
+        try:
+            rss = _current_rss()
+            if rss is not None and state["rss_peak"] is not None:
+                state["rss_peak"] = max(state["rss_peak"], rss)
+            current, _ = tracemalloc.get_traced_memory()
+            if current > state["traced"]:
+                state["traced"] = current
+                state["snapshot"] = tracemalloc.take_snapshot()
+        finally:
+            state["overhead"] += time.perf_counter() - paused
+            state["profiler"].enable()
+
+    def _store(self, profiler, duration, memory, baseline, live, final, metadata) -> None:
+        stats = pstats.Stats(profiler)
+        baseline = baseline.filter_traces(_SELF_FILTERS)
+        top = live.filter_traces(_SELF_FILTERS).compare_to(baseline, 'lineno')
+        retained = final.filter_traces(_SELF_FILTERS).compare_to(baseline, 'lineno')
+
+        capture = {
+            "id": next(self._counter),
+            "timestamp": time.time(),
+            "duration_ms": round(duration * 1000, 3),
+            # memory_peak_bytes covers Python allocations only; the RSS
+            # figures (where available) include native buffers too.
+            # rss_peak_growth_bytes is sampled at checkpoints, and
+            # max_rss_growth_bytes is non-zero only if the request pushed
+            # the process past its previous lifetime peak.
+            **memory,
+            # Allocations live at the fullest checkpoint (or at the end of
+            # the request if none was reached)
+            "top_allocations": self._format_stats(top),
+            # Allocations still alive after the request finished
+            "retained_allocations": self._format_stats(retained),
+            "metadata": metadata or {},
+            # Same layout as pstats.Stats.dump_stats() writes to disk
+            "_pstats": marshal.dumps(stats.stats)
+        }
+        with self._lock:
+            self._captures.append(capture)
+
+    def _format_stats(self, stats: list) -> list:
+        return [
+            {
+                "location": str(stat.traceback[0]),
+                "size_diff_bytes": stat.size_diff,
+                "count_diff": stat.count_diff
+            }
+            for stat in stats[:self.top_allocations]
+            if stat.size_diff > 0
+        ]
+
+    def list_captures(self) -> list:
+        """Return capture summaries, most recent first."""
+        with self._lock:
+            return [
+                {key: value for key, value in capture.items() if not key.startswith('_')}
+                for capture in reversed(self._captures)
+            ]
+
+    def get_pstats(self, capture_id: int) -> Optional[bytes]:
+        """Return a capture's profile in pstats format (.prof), or None."""
+        with self._lock:
+            for capture in self._captures:
+                if capture["id"] == capture_id:
+                    return capture["_pstats"]
+        return None
+
+    def get_text_report(self, capture_id: int, limit: int = 40) -> Optional[str]:
+        """Return a human-readable cumulative-time report for a capture."""
+        data = self.get_pstats(capture_id)
+        if data is None:
+            return None
+        stats = pstats.Stats(_StatsSource(data), stream=io.StringIO())
+        stats.sort_stats('cumulative').print_stats(limit)
+        return stats.stream.getvalue()
+
+
+class _StatsSource:
+    """Adapter letting pstats.Stats load a marshalled stats dict from memory."""
+
+    def __init__(self, data: bytes):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self) -> None:
+        pass
@@ -0,0 +1,232 @@
+"""
+Admission scheduler for model inference requests.
+
+All inference shares a single ONNX session, so interactive identifications
+from the web UI, camera captures and bulk uploads are admitted through a
+priority queue instead of racing each other for it:
+- Priority classes are served in order (interactive > camera > bulk)
+- Each class has its own concurrency cap and queue depth
+- Requests carry a deadline and are dropped once it has passed, before
+  any compute is spent on them
+- A request may ask for an exclusive slot (used when profiling) and then
+  runs with no other inference alongside it
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+# Priority classes, highest priority first
+PRIORITY_CLASSES = ["interactive", "camera", "bulk"]
+
+
+class SchedulerError(Exception):
+    """Base class for admission failures."""
+
+
+class QueueFullError(SchedulerError):
+    """Raised when a priority class already has too many waiting requests."""
+
+
+class DeadlineExceededError(SchedulerError):
+    """Raised when a request's deadline passes before it gets a slot."""
+
+
+class _Ticket:
+    """A request waiting for (or holding) an inference slot."""
+
+    __slots__ = ("priority", "deadline", "exclusive", "granted", "cancelled")
+
+    def __init__(self, priority: str, deadline: float, exclusive: bool = False):
+        self.priority = priority
+        self.deadline = deadline
+        self.exclusive = exclusive
+        self.granted = threading.Event()
+        self.cancelled = False
+
+
+class InferenceScheduler:
+    """
+    Priority- and deadline-aware admission control for inference.
+
+    Args:
+        max_concurrent: Total number of requests allowed to run at once
+        class_limits: Per-class concurrency caps, keyed by priority class
+        queue_limits: Per-class maximum number of waiting requests
+        default_deadlines: Per-class deadline in seconds when the caller
+            does not supply one
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 1,
+        class_limits: Optional[Dict[str, int]] = None,
+        queue_limits: Optional[Dict[str, int]] = None,
+        default_deadlines: Optional[Dict[str, float]] = None
+    ):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.class_limits = {
+            name: (class_limits or {}).get(name, self.max_concurrent)
+            for name in PRIORITY_CLASSES
+        }
+        self.queue_limits = {
+            name: (queue_limits or {}).get(name, 32)
+            for name in PRIORITY_CLASSES
+        }
+        self.default_deadlines = {
+            name: (default_deadlines or {}).get(name, 30.0)
+            for name in PRIORITY_CLASSES
+        }
+
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._queue = []  # heap of (rank, seq, ticket)
+        self._running = {name: 0 for name in PRIORITY_CLASSES}
+        self._waiting = {name: 0 for name in PRIORITY_CLASSES}
+        self._exclusive_running = False
+        self._stats = {
+            name: {"admitted": 0, "rejected": 0, "expired": 0}
+            for name in PRIORITY_CLASSES
+        }
+
+    def resolve_priority(self, value: Optional[str], default: str = "interactive") -> str:
+        """Map a client-supplied priority name to a known class."""
+        if value:
+            value = value.strip().lower()
+            if value in PRIORITY_CLASSES:
+                return value
+        return default
+
+    def resolve_deadline(self, priority: str, budget_ms: Optional[str] = None) -> float:
+        """
+        Compute an absolute deadline (monotonic clock) for a request.
+
+        A client-supplied budget may shorten, but never extend, the
+        class's default deadline.
+        """
+        budget = self.default_deadlines[priority]
+        if budget_ms:
+            try:
+                budget = min(budget, max(0.0, float(budget_ms) / 1000.0))
+            except ValueError:
+                pass
+        return time.monotonic() + budget
+
+    @contextmanager
+    def slot(self, priority: str, deadline: float, exclusive: bool = False):
+        """
+        Wait for an inference slot and hold it for the duration of the block.
+
+        An exclusive slot is granted only once no other inference is
+        running, and nothing else is admitted until it is released.
+
+        Raises:
+            QueueFullError: The class's queue is already at its limit
+            DeadlineExceededError: The deadline passed before admission
+        """
+        ticket = self._acquire(priority, deadline, exclusive)
+        try:
+            yield
+        finally:
+            self._release(ticket)
+
+    def _acquire(self, priority: str, deadline: float, exclusive: bool) -> _Ticket:
+        ticket = _Ticket(priority, deadline, exclusive)
+        with self._lock:
+            if deadline <= time.monotonic():
+                self._stats[priority]["expired"] += 1
+                raise DeadlineExceededError("Request deadline expired before admission")
+            if self._waiting[priority] >= self.queue_limits[priority]:
+                self._stats[priority]["rejected"] += 1
+                raise QueueFullError(f"Too many queued '{priority}' requests")
+            rank = PRIORITY_CLASSES.index(priority)
+            heapq.heappush(self._queue, (rank, next(self._counter), ticket))
+            self._waiting[priority] += 1
+            self._dispatch()
+
+        ticket.granted.wait(max(0.0, deadline - time.monotonic()))
+
+        with self._lock:
+            if not ticket.granted.is_set():
+                # Still queued: leave it in the heap, _dispatch skips it.
+                # _dispatch may already have dropped and counted it.
+                if not ticket.cancelled:
+                    ticket.cancelled = True
+                    self._waiting[priority] -= 1
+                    self._stats[priority]["expired"] += 1
+                raise DeadlineExceededError("Request deadline expired while queued")
+            if deadline <= time.monotonic():
+                # Granted too late to be useful; hand the slot to someone else
+                self._running[priority] -= 1
+                if exclusive:
+                    self._exclusive_running = False
+                self._stats[priority]["expired"] += 1
+                self._dispatch()
+                raise DeadlineExceededError("Request deadline expired while queued")
+            self._stats[priority]["admitted"] += 1
+        return ticket
+
+    def _release(self, ticket: _Ticket) -> None:
+        with self._lock:
+            self._running[ticket.priority] -= 1
+            if ticket.exclusive:
+                self._exclusive_running = False
+            self._dispatch()
+
+    def running_count(self) -> int:
+        """Return the number of inferences currently holding a slot."""
+        with self._lock:
+            return sum(self._running.values())
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiting tickets in priority order. Caller holds the lock."""
+        now = time.monotonic()
+        deferred = []
+        while (self._queue and not self._exclusive_running
+               and sum(self._running.values()) < self.max_concurrent):
+            entry = heapq.heappop(self._queue)
+            ticket = entry[2]
+            if ticket.cancelled:
+                continue
+            if ticket.deadline <= now:
+                # Drop expired work without granting it a slot; its waiter
+                # wakes up at the deadline and reports the expiry
+                ticket.cancelled = True
+                self._waiting[ticket.priority] -= 1
+                self._stats[ticket.priority]["expired"] += 1
+                continue
+            if self._running[ticket.priority] >= self.class_limits[ticket.priority]:
+                deferred.append(entry)
+                continue
+            if ticket.exclusive:
+                if sum(self._running.values()) > 0:
+                    # Wait for running work to drain; admit nothing else
+                    # meanwhile so the exclusive request is not starved
+                    deferred.append(entry)
+                    break
+                self._exclusive_running = True
+            self._waiting[ticket.priority] -= 1
+            self._running[ticket.priority] += 1
+            ticket.granted.set()
+        for entry in deferred:
+            heapq.heappush(self._queue, entry)
+
+    def get_stats(self) -> dict:
+        """Return a snapshot of queue depths, running counts and counters."""
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "classes": {
+                    name: {
+                        "running": self._running[name],
+                        "waiting": self._waiting[name],
+                        "limit": self.class_limits[name],
+                        **self._stats[name]
+                    }
+                    for name in PRIORITY_CLASSES
+                }
+            }
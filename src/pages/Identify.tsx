@@ -4,7 +4,7 @@ import { motion, AnimatePresence } from "framer-motion";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
-import { predictSnake, PredictionResult } from "@/services/api";
+import { predictSnake, PredictionResult, ServerBusyError } from "@/services/api";
 import { Upload, Camera, AlertTriangle, CheckCircle, Loader2, ImageIcon, ExternalLink, RotateCcw } from "lucide-react";
 
 // Species ID mapping for image lookup (matches database IDs)
@@ -26,6 +26,7 @@ const Identify = () => {
   const [prediction, setPrediction] = useState<PredictionResult | null>(null);
   const [loading, setLoading] = useState(false);
   const [hasIdentified, setHasIdentified] = useState(false);
+  const [errorMessage, setErrorMessage] = useState<string | null>(null);
   const fileInputRef = useRef<HTMLInputElement>(null);
   const navigate = useNavigate();
 
@@ -37,6 +38,7 @@ const Identify = () => {
         setImagePreview(reader.result as string);
         setPrediction(null);
         setHasIdentified(false);
+        setErrorMessage(null);
       };
       reader.readAsDataURL(file);
     }
@@ -46,6 +48,7 @@ const Identify = () => {
     if (!imagePreview) return;
     
     setLoading(true);
+    setErrorMessage(null);
     try {
       const results = await predictSnake(imagePreview);
       // Only show the highest confidence prediction
@@ -55,6 +58,9 @@ const Identify = () => {
       }
     } catch (error) {
       console.error('Prediction failed:', error);
+      if (error instanceof ServerBusyError) {
+        setErrorMessage(error.message);
+      }
     } finally {
       setLoading(false);
     }
@@ -64,6 +70,7 @@ const Identify = () => {
     setImagePreview(null);
     setPrediction(null);
     setHasIdentified(false);
+    setErrorMessage(null);
     if (fileInputRef.current) {
       fileInputRef.current.value = '';
     }
@@ -213,6 +220,13 @@ const Identify = () => {
                     )}
                   </div>
                   
+                  {errorMessage && (
+                    <div className="flex items-start gap-2 rounded-lg border border-amber-500/50 bg-amber-500/10 p-3 text-sm text-muted-foreground">
+                      <AlertTriangle className="h-4 w-4 text-amber-500 mt-0.5 flex-shrink-0" />
+                      <p>{errorMessage}</p>
+                    </div>
+                  )}
+                  
                   {!hasIdentified ? (
                     <div className="flex gap-2">
                       <Button
@@ -119,6 +119,15 @@ export async function deleteObservation(id: number): Promise<ApiResponse<void>>
 
 // ==================== ML PREDICTION ENDPOINTS (Python) ====================
 
+// Raised when the prediction server is overloaded (503) or the request
+// expired in its queue (504); the caller should ask the user to retry
+export class ServerBusyError extends Error {
+  constructor(message = 'The identification server is busy. Please try again in a moment.') {
+    super(message);
+    this.name = 'ServerBusyError';
+  }
+}
+
 export async function predictSnake(imageBase64: string): Promise<PredictionResult[]> {
   try {
     const controller = new AbortController();
@@ -129,6 +138,8 @@ export async function predictSnake(imageBase64: string): Promise<PredictionResul
       headers: { 
         'Content-Type': 'application/json',
         'Accept': 'application/json',
+        // Unlabelled /predict requests are scheduled as bulk
+        'X-Priority': 'interactive',
       },
       body: JSON.stringify({ image: imageBase64 }),
       signal: controller.signal,
@@ -137,6 +148,10 @@ export async function predictSnake(imageBase64: string): Promise<PredictionResul
     
     clearTimeout(timeoutId);
     
+    if (response.status === 503 || response.status === 504) {
+      throw new ServerBusyError();
+    }
+    
     if (!response.ok) {
       console.error('Prediction API returned error:', response.status);
       return getMockPredictions();
@@ -145,6 +160,10 @@ export async function predictSnake(imageBase64: string): Promise<PredictionResul
     const data = await response.json();
     return data.success ? data.predictions : getMockPredictions();
   } catch (error) {
+    // Never substitute mock results for a busy server
+    if (error instanceof ServerBusyError) {
+      throw error;
+    }
     console.error('Prediction API Error:', error);
     console.log('Note: If you see ERR_BLOCKED_BY_CLIENT, disable ad blockers for localhost');
     console.log('Falling back to mock predictions...');